@@ -49,20 +49,21 @@ POOLS = [
 # ==============================================================================
 FALLBACK_FEE_TIERS = [500, 3000, 10000]
 
+# Overrides are symmetric: list each pair once, in either order.
 POOL_FEE_OVERRIDE = {
     # Prefer 1.00% (10000) for GALA ↔ GWETH since that’s the tier we’ve seen active
     ("GALA", "GWETH"): [10000],
-    ("GWETH", "GALA"): [10000],
 
     # Force 1.00% tier for GWETH ↔ GUSDC so the bot probes this edge properly
     ("GWETH", "GUSDC"): [10000],
-    ("GUSDC", "GWETH"): [10000],
 
     # Optional: if you want to scan GUSDT ↔ GWETH too, pin to 1.00%
     ("GUSDT", "GWETH"): [10000],
-    ("GWETH", "GUSDT"): [10000],
 }
 
+# Direction-agnostic view of POOL_FEE_OVERRIDE, keyed by frozenset({a, b})
+_FEE_BY_PAIR = {frozenset(k): v for k, v in POOL_FEE_OVERRIDE.items()}
+
 # ==============================================================================
 # SECTION 6: RISK MANAGEMENT
 # ==============================================================================
@@ -88,5 +89,19 @@ MAX_HOP_INPUT = Decimal(os.getenv("ARB_MAX_HOP_INPUT", "0"))
 DRY_RUN = os.getenv("ARB_DRY_RUN", "true").lower() in ("1", "true", "yes")
 MAX_CYCLES_PER_SCAN = 12
 HTTP_TIMEOUT = int(os.getenv("GALA_HTTP_TIMEOUT", "15"))
+HTTP_MAX_WORKERS = int(os.getenv("GALA_HTTP_MAX_WORKERS", "16"))  # concurrent quote requests in flight
+HTTP_POOL_SIZE = int(os.getenv("GALA_HTTP_POOL_SIZE", "32"))  # keep-alive connections per host
+QUOTE_CACHE_TTL_SECONDS = float(os.getenv("GALA_QUOTE_CACHE_TTL_SECONDS", "1.5"))  # 0 = no quote caching
+# Optional batch quote endpoint (e.g. "/v1/trade/quote/batch"); empty = one GET per quote
+QUOTE_BATCH_PATH = os.getenv("GALA_QUOTE_BATCH_PATH", "")
+QUOTE_BATCH_MAX_ITEMS = 25  # probes per batch request
+SIM_WORKERS = int(os.getenv("ARB_SIM_WORKERS", "32"))  # cycles simulated concurrently per scan
+# transaction-status values that count as a landed swap. Any other final status, a
+# timeout or a polling error stops the cycle before the next hop is submitted
+TX_SUCCESS_STATUSES = frozenset(
+    s.strip().upper() for s in os.getenv("GALA_TX_SUCCESS_STATUSES", "PROCESSED,SUCCESS").split(",") if s.strip()
+)
+TX_STATUS_TIMEOUT_SECONDS = float(os.getenv("GALA_TX_STATUS_TIMEOUT_SECONDS", "20"))  # per-hop status polling budget
 SCAN_INTERVAL_SECONDS = int(os.getenv("ARB_SCAN_INTERVAL_SECONDS", "15"))
 POOL_REFRESH_INTERVAL = int(os.getenv("ARB_POOL_REFRESH_INTERVAL", "10"))
+LOG_LEVEL = os.getenv("ARB_LOG_LEVEL", "INFO").upper()  # DEBUG shows every probe, hop and cycle
@@ -1,22 +1,105 @@
 # gala_api.py
 from __future__ import annotations
 import json
-from dataclasses import dataclass
-from decimal import Decimal, getcontext
-getcontext().prec = 40  # high precision for chained quotes
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from decimal import Decimal
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+import threading
 import time
+from urllib.parse import quote_plus, urlencode
 from . import config
-import requests
 
-from eth_hash.auto import keccak as keccak256  # keccak-256 (Ethereum) via eth-hash
-from eth_keys import keys
+# requests, eth_hash and eth_keys are imported on first use so that importing this
+# module (config checks, dry-run tooling) doesn't pay for backend discovery / coincurve
+if TYPE_CHECKING:
+    import requests
+    from eth_keys import keys
 
+try:
+    import orjson  # optional: C-accelerated JSON for response decoding
+except ImportError:
+    orjson = None
 
-def _ckey_obj(ckey: str) -> Dict[str, str]:
-    """ "GALA$Unit$none$none" -> {"value": "GALA", ...} """
-    parts = ckey.split("$")
-    return {"value": parts[0], "type": parts[1], "collection": parts[2], "category": parts[3]}
+
+def _ckey_obj(composite_key: str) -> dict:
+    # "GALA$Unit$none$none" => {collection, category, type, additionalKey}
+    parts = composite_key.split("$")
+    if len(parts) != 4:
+        raise ValueError(f"Unexpected composite key format: {composite_key}")
+    return {
+        "collection": parts[0],
+        "category": parts[1],
+        "type": parts[2],
+        "additionalKey": parts[3],
+    }
+
+
+_BPS_SCALE = Decimal(10_000)
+
+
+def _canonical_json(obj) -> bytes:
+    """
+    sorted keys, no whitespace. Always the stdlib encoder: these are the bytes we sign,
+    and orjson differs on non-ASCII, float exponents and big ints. One call per swap.
+    """
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def _loads(content: bytes):
+    """
+    decode a quote response; orjson when available, else stdlib json. Not for payloads
+    we sign or submit: orjson turns integers wider than 64 bits into floats.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+@lru_cache(maxsize=None)
+def _slippage_factors(slippage_bps: int) -> Tuple[Decimal, Decimal]:
+    """ 40 -> (Decimal(9960), Decimal(10040)); divide by _BPS_SCALE after multiplying """
+    return Decimal(10_000 - slippage_bps), Decimal(10_000 + slippage_bps)
+
+
+_keccak256 = None
+_PrivateKey = None
+# requests.HTTPError, bound by GalaSwapAPI() with the rest of the deferred requests import
+_HTTPError = None
+
+
+def _load_signing_backend() -> None:
+    global _keccak256, _PrivateKey
+    if _PrivateKey is not None:
+        return
+    # keccak-256 (Ethereum) via eth-hash; bind the backend function once instead of
+    # going through eth_hash.auto's dispatch on every call
+    try:
+        from eth_hash.backends.pycryptodome import keccak256
+    except ImportError:
+        try:
+            from eth_hash.backends.pysha3 import keccak256
+        except ImportError:
+            from eth_hash.auto import keccak as keccak256
+    from eth_keys.keys import PrivateKey
+
+    _keccak256 = keccak256
+    _PrivateKey = PrivateKey
+
+
+def _is_server_error(e: Exception) -> bool:
+    """ HTTPError carrying a 5xx response """
+    response = getattr(e, "response", None)
+    return response is not None and response.status_code >= 500
+
+
+def load_private_key(private_key_hex: str) -> keys.PrivateKey:
+    """ Parse a hex private key once so signing doesn't redo it per hop. """
+    if not private_key_hex:
+        raise ValueError("PRIVATE_KEY_HEX is empty. Set GALA_PRIVATE_KEY.")
+    _load_signing_backend()
+    return _PrivateKey(bytes.fromhex(private_key_hex.replace("0x", "")))
 
 
 @dataclass
@@ -28,10 +111,66 @@ class Quote:
     fee_used: Optional[int]
 
 
+QuoteProbe = Tuple[str, str, Decimal, Optional[int]]
+QuoteCacheKey = Tuple[str, str, str, Optional[int]]
+
+_QUOTE_CACHE_MAXSIZE = 1024
+
+# transaction-status values that mean "not settled yet"; anything else ends polling.
+# The API doesn't publish its status vocabulary: this only decides when to stop polling,
+# whether the tx landed is tx_succeeded()'s call, against config.TX_SUCCESS_STATUSES
+_PENDING_TX_STATUSES = frozenset({"", "PENDING", "RECEIVED", "SUBMITTED"})
+
+
 class GalaSwapAPI:
+    __slots__ = (
+        "base_url", "session", "_timeout", "_executor",
+        "_quote_cache", "_quote_cache_lock", "_quote_url_cache", "_batch_supported",
+    )
+
     def __init__(self, base_url: str | None = None, session: Optional[requests.Session] = None):
+        global _HTTPError
+        from requests import HTTPError as _HTTPError
+
         self.base_url = base_url or config.API_BASE_URL
-        self.session = session or requests.Session()
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            session = requests.Session()
+            # keep-alive pool sized for the quote fan-out, with bounded retries on transient
+            # gateway errors (idempotent methods only, so swap/bundle POSTs are never replayed)
+            # never fewer pooled connections than threads that can be mid-request at once, or
+            # urllib3 discards the extras: the quote workers plus simulate_cycles' threads, which
+            # call get_quote directly on pinned-fee edges
+            pool_size = max(config.HTTP_POOL_SIZE, config.HTTP_MAX_WORKERS + config.SIM_WORKERS)
+            adapter = HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                # raise_on_status=False: once retries run out, hand back the last 5xx response so
+                # raise_for_status() still raises HTTPError (a skipped tier), not RetryError
+                max_retries=Retry(
+                    total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504], raise_on_status=False
+                ),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self._timeout = config.HTTP_TIMEOUT
+        # quote fan-out runs on worker threads; requests releases the GIL while waiting on sockets
+        self._executor = ThreadPoolExecutor(max_workers=config.HTTP_MAX_WORKERS, thread_name_prefix="gala-quote")
+        # short-lived memo of successful quotes: key -> (expires_at, quote)
+        self._quote_cache: Dict[QuoteCacheKey, Tuple[float, Quote]] = {}
+        self._quote_cache_lock = threading.Lock()
+        # (token_in, token_out, fee) -> ".../v1/trade/quote?...&amountIn=" with everything but the amount encoded
+        self._quote_url_cache: Dict[Tuple[str, str, int], str] = {}
+        # flips to False the first time the backend rejects QUOTE_BATCH_PATH
+        self._batch_supported = bool(config.QUOTE_BATCH_PATH)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.session.close()
 
     # ---- Helpers ----
     def _ckey(self, symbol: str) -> str:
@@ -40,46 +179,215 @@ class GalaSwapAPI:
         except KeyError:
             raise KeyError(f"No composite key configured for token symbol '{symbol}'. Add it to TOKEN_KEYS.")
 
+    def _ckey_fields(self, symbol: str) -> dict:
+        ckey = self._ckey(symbol)
+        return _CKEY_OBJ_BY_COMPOSITE.get(ckey) or _ckey_obj(ckey)
+
     def _fees_for_pair(self, a: str, b: str) -> List[int]:
-        key = (a, b)
-        rkey = (b, a)
-        return config.POOL_FEE_OVERRIDE.get(key) or config.POOL_FEE_OVERRIDE.get(rkey) or config.FALLBACK_FEE_TIERS
+        return _FEES_FOR_PAIR.get((a, b), config.FALLBACK_FEE_TIERS)
+
+    def _quote_url_prefix(self, token_in_sym: str, token_out_sym: str, fee: int) -> str:
+        key = (token_in_sym, token_out_sym, fee)
+        prefix = self._quote_url_cache.get(key)
+        if prefix is None:
+            query = urlencode({
+                "tokenIn": self._ckey(token_in_sym),
+                "tokenOut": self._ckey(token_out_sym),
+                "fee": fee,
+            })
+            prefix = f"{self.base_url}/v1/trade/quote?{query}&amountIn="
+            self._quote_url_cache[key] = prefix
+        return prefix
 
     # ---- Quotes ----
     def get_quote(self, token_in_sym: str, token_out_sym: str, amount_in: Decimal, fee: Optional[int] = None) -> Quote:
         """
         Fetches a single quote for a given pair, amount, and fee.
         Raises HTTPError on API error (e.g. no liquidity).
+        Successful quotes are reused for QUOTE_CACHE_TTL_SECONDS.
         """
-        params = {
-            "tokenIn": self._ckey(token_in_sym),
-            "tokenOut": self._ckey(token_out_sym),
-            "amountIn": str(amount_in),
-        }
+        key = (token_in_sym, token_out_sym, str(amount_in), fee)
+        cached = self._cached_quote(key)
+        if cached is not None:
+            return cached
+
         if fee is not None:
-            params["fee"] = fee
-        url = f"{self.base_url}/v1/trade/quote"
-        r = self.session.get(url, params=params, timeout=config.HTTP_TIMEOUT)
+            url = self._quote_url_prefix(token_in_sym, token_out_sym, fee) + quote_plus(str(amount_in))
+            r = self.session.get(url, timeout=self._timeout)
+        else:
+            params = {
+                "tokenIn": self._ckey(token_in_sym),
+                "tokenOut": self._ckey(token_out_sym),
+                "amountIn": str(amount_in),
+            }
+            url = f"{self.base_url}/v1/trade/quote"
+            r = self.session.get(url, params=params, timeout=self._timeout)
         r.raise_for_status()
-        j = r.json()
-        data = j.get("data") or {}
+        j = _loads(r.content)
+        quote = self._quote_from_data(token_in_sym, token_out_sym, amount_in, fee, j.get("data") or {})
+        self._remember_quote(key, quote)
+        return replace(quote)
+
+    @staticmethod
+    def _quote_from_data(
+        token_in_sym: str, token_out_sym: str, amount_in: Decimal, fee: Optional[int], data: dict
+    ) -> Quote:
         amount_out = Decimal(str(data.get("amountOut", "0")))
         fee_used = data.get("fee") if data.get("fee") is not None else fee
 
         if amount_out == 0:
             raise ValueError("Quote returned zero amount out, indicating no liquidity.")
 
-        return Quote(token_in_sym, token_out_sym, Decimal(str(amount_in)), amount_out, fee_used)
+        if not isinstance(amount_in, Decimal):
+            amount_in = Decimal(str(amount_in))
+        return Quote(token_in_sym, token_out_sym, amount_in, amount_out, fee_used)
 
-    def best_quote(self, token_in_sym: str, token_out_sym: str, amount_in: Decimal) -> Quote:
-        best: Optional[Quote] = None
-        for f in self._fees_for_pair(token_in_sym, token_out_sym):
+    def _cached_quote(self, key: QuoteCacheKey) -> Optional[Quote]:
+        cache = self._quote_cache
+        with self._quote_cache_lock:
+            hit = cache.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            return replace(hit[1])
+        return None
+
+    def _remember_quote(self, key: QuoteCacheKey, quote: Quote) -> None:
+        ttl = config.QUOTE_CACHE_TTL_SECONDS
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._quote_cache_lock:
+            if len(self._quote_cache) >= _QUOTE_CACHE_MAXSIZE:
+                self._quote_cache = {k: v for k, v in self._quote_cache.items() if v[0] > now}
+                if len(self._quote_cache) >= _QUOTE_CACHE_MAXSIZE:
+                    self._quote_cache.clear()
+            self._quote_cache[key] = (now + ttl, quote)
+
+    def clear_quote_cache(self) -> None:
+        with self._quote_cache_lock:
+            self._quote_cache.clear()
+
+    def get_quotes(self, probes: Sequence[QuoteProbe]) -> List[Union[Quote, Exception]]:
+        """
+        Fetches several quotes concurrently over the shared session.
+        Results line up with `probes`; a failed probe yields its exception instead of a Quote.
+        """
+        get_quote = self.get_quote
+
+        def _one(probe: QuoteProbe) -> Union[Quote, Exception]:
             try:
-                q = self.get_quote(token_in_sym, token_out_sym, amount_in, fee=f)
-                if best is None or q.amount_out > best.amount_out:
-                    best = q
-            except (requests.HTTPError, ValueError):
+                return get_quote(*probe)
+            except Exception as e:
+                return e
+
+        if len(probes) == 1:
+            return [_one(probes[0])]
+        return list(self._executor.map(_one, probes))
+
+    def get_quotes_batch(self, probes: Sequence[QuoteProbe]) -> List[Union[Quote, Exception]]:
+        """
+        Like get_quotes, but folds the uncached probes into POSTs to QUOTE_BATCH_PATH
+        (at most QUOTE_BATCH_MAX_ITEMS each) when the backend offers a batch quote
+        endpoint. Falls back to concurrent single quotes when it is unset or the
+        backend rejects it.
+        Expects {"data": [<single-quote data, or {"error"/"status": ...}>, ...]} in probe order.
+        """
+        if not self._batch_supported or len(probes) < 2:
+            return self.get_quotes(probes)
+
+        results: List[Union[Quote, Exception, None]] = [None] * len(probes)
+        pending: List[int] = []
+        for i, (t_in, t_out, amt, fee) in enumerate(probes):
+            cached = self._cached_quote((t_in, t_out, str(amt), fee))
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+        if not pending:
+            return results  # type: ignore[return-value]
+
+        # keep each POST small so the backend doesn't serialize one huge request
+        size = max(1, config.QUOTE_BATCH_MAX_ITEMS)
+        chunks = [[probes[i] for i in pending[n:n + size]] for n in range(0, len(pending), size)]
+        if len(chunks) == 1:
+            posted = [self._post_quote_batch(chunks[0])]
+        else:
+            posted = list(self._executor.map(self._post_quote_batch, chunks))
+
+        if any(outcomes is None for outcomes in posted):
+            self._batch_supported = False
+            fallback = self.get_quotes([probes[i] for i in pending])
+            for i, outcome in zip(pending, fallback):
+                results[i] = outcome
+            return results  # type: ignore[return-value]
+
+        for i, outcome in zip(pending, (o for outcomes in posted for o in outcomes)):
+            results[i] = outcome
+        return results  # type: ignore[return-value]
+
+    def _post_quote_batch(self, probes: Sequence[QuoteProbe]) -> Optional[List[Union[Quote, Exception]]]:
+        """ One batch POST; None if the backend has no batch endpoint or doesn't speak our batch format. """
+        body = []
+        for t_in, t_out, amt, fee in probes:
+            item = {"tokenIn": self._ckey(t_in), "tokenOut": self._ckey(t_out), "amountIn": str(amt)}
+            if fee is not None:
+                item["fee"] = fee
+            body.append(item)
+
+        url = f"{self.base_url}{config.QUOTE_BATCH_PATH}"
+        try:
+            r = self.session.post(url, json=body, timeout=self._timeout)
+            # no such route, or it rejects a list body: fall back to per-quote GETs
+            if r.status_code in (400, 404, 405, 422, 501):
+                return None
+            r.raise_for_status()
+            j = _loads(r.content)
+        except Exception as e:
+            # the whole chunk failed; report it per probe like get_quotes does
+            return [e] * len(probes)
+        items = j.get("data") if isinstance(j, dict) else None
+        if not isinstance(items, list):
+            # a 200 that isn't one result per probe (e.g. a single-quote dict)
+            return None
+
+        outcomes: List[Union[Quote, Exception]] = []
+        for n, (t_in, t_out, amt, fee) in enumerate(probes):
+            data = items[n] if n < len(items) else None
+            status = data.get("status") if isinstance(data, dict) else None
+            if not data or data.get("error") or (isinstance(status, int) and status >= 400):
+                err = data and (data.get("error") or status)
+                outcomes.append(ValueError(f"Batch quote failed for {t_in}->{t_out} (fee {fee}): {err}"))
+                continue
+            try:
+                quote = self._quote_from_data(t_in, t_out, amt, fee, data)
+            except ValueError as e:
+                outcomes.append(e)
                 continue
+            self._remember_quote((t_in, t_out, str(amt), fee), quote)
+            outcomes.append(replace(quote))
+        return outcomes
+
+    def best_quote(self, token_in_sym: str, token_out_sym: str, amount_in: Decimal) -> Quote:
+        fees = self._fees_for_pair(token_in_sym, token_out_sym)
+        if len(fees) == 1:
+            # pinned tier (POOL_FEE_OVERRIDE): nothing to compare, ask directly
+            try:
+                return self.get_quote(token_in_sym, token_out_sym, amount_in, fee=fees[0])
+            except (_HTTPError, ValueError) as e:
+                if _is_server_error(e):
+                    raise
+                raise RuntimeError(f"No quote available for {token_in_sym}->{token_out_sym}") from e
+
+        best: Optional[Quote] = None
+        # all fee tiers for this edge are requested together
+        for q in self.get_quotes_batch([(token_in_sym, token_out_sym, amount_in, f) for f in fees]):
+            if isinstance(q, Exception):
+                # a 4xx/bad body means no pool at this tier; 5xx is an outage the session
+                # already retried, and must not look like "no liquidity" to the caller
+                if isinstance(q, (_HTTPError, ValueError)) and not _is_server_error(q):
+                    continue
+                raise q
+            if best is None or q.amount_out > best.amount_out:
+                best = q
         if best is None:
             raise RuntimeError(f"No quote available for {token_in_sym}->{token_out_sym}")
         return best
@@ -95,12 +403,13 @@ class GalaSwapAPI:
         slippage_bps: int,
     ) -> dict:
         # slippage protections
-        out_min = quoted_out * (Decimal(1) - Decimal(slippage_bps) / Decimal(10_000))
-        in_max = amount_in * (Decimal(1) + Decimal(slippage_bps) / Decimal(10_000))
+        slip_lo, slip_hi = _slippage_factors(slippage_bps)
+        out_min = quoted_out * slip_lo / _BPS_SCALE
+        in_max = amount_in * slip_hi / _BPS_SCALE
 
         body = {
-            "tokenIn": _ckey_obj(self._ckey(token_in_sym)),
-            "tokenOut": _ckey_obj(self._ckey(token_out_sym)),
+            "tokenIn": self._ckey_fields(token_in_sym),
+            "tokenOut": self._ckey_fields(token_out_sym),
             "amountIn": str(amount_in),
             # Provide amountOutMinimum for protection; also provide amountOut echo for compatibility
             "amountOut": str(quoted_out),
@@ -111,29 +420,29 @@ class GalaSwapAPI:
         }
 
         url = f"{self.base_url}/v1/trade/swap"
-        r = self.session.post(url, json=body, timeout=config.HTTP_TIMEOUT)
+        r = self.session.post(url, json=body, timeout=self._timeout)
         r.raise_for_status()
-        j = r.json()
+        # stdlib json: this payload is re-encoded and signed, so it must round-trip exactly
+        j = json.loads(r.content)
         data = j.get("data") or {}
         # API returns a payload with a uniqueKey to sign
         return data
 
     # ---- Signing & bundle submission ----
-    def sign_payload(self, payload: dict, private_key_hex: str) -> str:
-        if not private_key_hex:
-            raise ValueError("PRIVATE_KEY_HEX is empty. Set GALA_PRIVATE_KEY.")
+    def sign_payload(self, payload: dict, private_key: Union[str, keys.PrivateKey]) -> str:
+        if isinstance(private_key, str):
+            private_key = load_private_key(private_key)
+        _load_signing_backend()
 
         # strip any transient fields and encode deterministically
         sanitized = dict(payload)
         sanitized.pop("signature", None)
         sanitized.pop("trace", None)
 
-        encoded = json.dumps(sanitized, sort_keys=True, separators=(",", ":")).encode()
-        digest = keccak256(encoded)  # 32-byte keccak-256
+        encoded = _canonical_json(sanitized)
+        digest = _keccak256(encoded)  # 32-byte keccak-256
 
-        key_bytes = bytes.fromhex(private_key_hex.replace("0x", ""))
-        priv = keys.PrivateKey(key_bytes)
-        sig = priv.sign_msg_hash(digest)  # r, s ints; v in {27, 28}
+        sig = private_key.sign_msg_hash(digest)  # r, s ints; v in {27, 28}
 
         r = sig.r.to_bytes(32, "big")
         s = sig.s.to_bytes(32, "big")
@@ -150,27 +459,63 @@ class GalaSwapAPI:
             "signature": signature_hex,
             "user": user,
         }
-        r = self.session.post(url, json=body, timeout=config.HTTP_TIMEOUT)
+        r = self.session.post(url, json=body, timeout=self._timeout)
         r.raise_for_status()
-        j = r.json()
+        j = json.loads(r.content)
         return (j.get("data") or {}).get("data", "")  # transaction id
 
     def check_tx_status(self, tx_id: str) -> dict:
         url = f"{self.base_url}/v1/trade/transaction-status"
-        r = self.session.get(url, params={"id": tx_id}, timeout=config.HTTP_TIMEOUT)
+        r = self.session.get(url, params={"id": tx_id}, timeout=self._timeout)
         r.raise_for_status()
-        return r.json().get("data") or {}
+        return json.loads(r.content).get("data") or {}
 
+    @staticmethod
+    def tx_succeeded(status: dict) -> bool:
+        """ True only for a status listed in TX_SUCCESS_STATUSES; unknown or pending is a failure. """
+        return str(status.get("status") or "").upper() in config.TX_SUCCESS_STATUSES
+
+    def wait_for_tx_status(
+        self,
+        tx_id: str,
+        timeout: float | None = None,
+        first_delay: float = 0.25,
+        max_delay: float = 2.0,
+    ) -> dict:
+        """
+        Polls check_tx_status with exponential backoff until the status is no longer
+        pending, and returns it. After `timeout` seconds the last status seen is
+        returned (or the last polling error raised if none succeeded).
+        """
+        deadline = time.monotonic() + (config.TX_STATUS_TIMEOUT_SECONDS if timeout is None else timeout)
+        delay = first_delay
+        status: Optional[dict] = None
+        last_err: Optional[Exception] = None
+        while True:
+            time.sleep(delay)
+            try:
+                status = self.check_tx_status(tx_id)
+                if str(status.get("status") or "").upper() not in _PENDING_TX_STATUSES:
+                    return status
+            except Exception as e:
+                last_err = e
+            if time.monotonic() + delay >= deadline:
+                break
+            delay = min(delay * 2, max_delay)
+        if status is None and last_err is not None:
+            raise last_err
+        return status or {}
+
+
+def _build_fee_table() -> Dict[Tuple[str, str], List[int]]:
+    # every configured pair in both directions; overrides apply symmetrically
+    table: Dict[Tuple[str, str], List[int]] = {}
+    for a, b in list(config.POOLS) + list(config.POOL_FEE_OVERRIDE):
+        for key in ((a, b), (b, a)):
+            table[key] = config._FEE_BY_PAIR.get(frozenset(key)) or config.FALLBACK_FEE_TIERS
+    return table
 
-def _ckey_obj(composite_key: str) -> dict:
-    # "GALA$Unit$none$none" => {collection, category, type, additionalKey}
-    parts = composite_key.split("$")
-    if len(parts) != 4:
-        raise ValueError(f"Unexpected composite key format: {composite_key}")
-    return {
-        "collection": parts[0],
-        "category": parts[1],
-        "type": parts[2],
-        "additionalKey": parts[3],
-    }
 
+# TOKEN_KEYS / POOLS / POOL_FEE_OVERRIDE are static, so resolve them once at import
+_CKEY_OBJ_BY_COMPOSITE: Dict[str, dict] = {ck: _ckey_obj(ck) for ck in set(config.TOKEN_KEYS.values())}
+_FEES_FOR_PAIR: Dict[Tuple[str, str], List[int]] = _build_fee_table()
@@ -3,15 +3,22 @@
 # file: strategies.py
 # ==========================================
 from __future__ import annotations
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+import logging
+import threading
+import time
+from functools import lru_cache
 from decimal import Decimal
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 from . import config
 from .gala_api import GalaSwapAPI, Quote
 
+log = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class ActivePool:
     token_a: str
     token_b: str
@@ -28,7 +35,7 @@ class ActivePool:
         raise ValueError(f"Token {token} not in pool")
 
 
-@dataclass
+@dataclass(slots=True)
 class Hop:
     token_in: str
     token_out: str
@@ -38,7 +45,7 @@ class Hop:
     payload: dict | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class CycleResult:
     path: List[Hop]
     start_token: str
@@ -47,34 +54,63 @@ class CycleResult:
     gross_profit_bps: int
 
 
-def discover_active_pools(api: GalaSwapAPI, pools: Sequence[Tuple[str, str]]) -> List[ActivePool]:
-    print("Discovering active pools and fee tiers...")
-    active_pools = []
-    seen_fees = set()
-
+# amount_out / amount_in of the last discovery probe per (t_in, t_out, fee): a rough
+# mid-price (fee included) for pruning triangles before any per-scan quotes
+_last_price: Dict[Tuple[str, str, int], Decimal] = {}
+_FEE_SCALE = Decimal(1_000_000)  # fee tiers are in millionths: 3000 = 0.30%
+# (noted_at, rate) per direction: seeded from the best of those over fee tiers, then
+# overwritten by every quote a scan fetches. A probed a->b rate is m*(1-f), so 1/rate
+# would credit the fee to us on b->a; the unprobed direction is (1/rate)*(1-f)^2 instead
+_edge_rate: Dict[Tuple[str, str], Tuple[float, Decimal]] = {}
+# older rates don't prune: one survives the sleep into the next scan, not past it, so an
+# edge whose triangles were all pruned goes unpriced and gets simulated (and re-priced) again
+_EDGE_RATE_MAX_AGE = 2 * config.SCAN_INTERVAL_SECONDS
+
+
+def discover_active_pools(api: GalaSwapAPI, pools: Sequence[Tuple[str, str]]) -> Tuple[ActivePool, ...]:
+    log.info("Discovering active pools and fee tiers...")
+    active_pools: List[ActivePool] = []
+    _last_price.clear()
+    _edge_rate.clear()
+    # the pool set is about to change, so triangles built from the old one are dead weight
+    enumerate_triangles.cache_clear()
+    # (canonical pair, fee) already queued; either direction of a pool shares one entry
+    seen_fees: Set[Tuple[Tuple[str, str], int]] = set()
+
+    probes = []
     for a, b in pools:
-        # Check both directions A->B and B->A
-        for t_in, t_out in [(a, b), (b, a)]:
-            fees = config.POOL_FEE_OVERRIDE.get((t_in, t_out)) or \
-                   config.POOL_FEE_OVERRIDE.get((t_out, t_in)) or \
-                   config.FALLBACK_FEE_TIERS
-
-            for fee in fees:
-                # Avoid re-checking the same pool/fee combination (e.g. A/B fee 3000 vs B/A fee 3000)
-                pool_key = tuple(sorted((t_in, t_out)))
-                if (pool_key, fee) in seen_fees:
-                    continue
-                seen_fees.add((pool_key, fee))
-
-                try:
-                    # Use a configurable amount to check for real liquidity
-                    api.get_quote(t_in, t_out, config.LIQUIDITY_CHECK_AMOUNT, fee)
-                    active_pools.append(ActivePool(t_in, t_out, fee))
-                    print(f"  [ok] {t_in}-{t_out} (fee: {fee}) is active.")
-                except Exception:
-                    print(f"  [--] {t_in}-{t_out} (fee: {fee}) is inactive.")
-                    continue
-    print(f"Found {len(active_pools)} active pool-fee combinations.")
+        pair = (a, b) if a < b else (b, a)
+        fees = config._FEE_BY_PAIR.get(frozenset(pair)) or config.FALLBACK_FEE_TIERS
+
+        for fee in fees:
+            # Avoid re-checking the same pool/fee combination (e.g. A/B fee 3000 vs B/A fee 3000)
+            if (pair, fee) in seen_fees:
+                continue
+            seen_fees.add((pair, fee))
+            # Use a configurable amount to check for real liquidity. One direction is enough:
+            # pool liquidity is symmetric, so an active a->b pool is also usable b->a
+            probes.append((a, b, config.LIQUIDITY_CHECK_AMOUNT, fee))
+
+    # Fire every probe at once (one batch POST per QUOTE_BATCH_MAX_ITEMS when the backend
+    # supports it, else concurrent GETs); results come back in probe order
+    for (t_in, t_out, _, fee), q in zip(probes, api.get_quotes_batch(probes)):
+        if isinstance(q, Exception):
+            # keep the reason: with probes in flight together, a timeout looks just like "no pool"
+            log.debug("  [--] %s-%s (fee: %s) is inactive: %s", t_in, t_out, fee, q)
+            continue
+        active_pools.append(ActivePool(t_in, t_out, fee))
+        if q.amount_in > 0 and q.amount_out > 0:
+            _last_price[(t_in, t_out, fee)] = q.amount_out / q.amount_in
+        log.debug("  [ok] %s-%s (fee: %s) is active.", t_in, t_out, fee)
+    log.info("Found %d active pool-fee combinations.", len(active_pools))
+    best_rate: Dict[Tuple[str, str], Decimal] = {}
+    for (t_in, t_out, fee), price in _last_price.items():
+        keep = 1 - Decimal(fee) / _FEE_SCALE
+        for edge, rate in (((t_in, t_out), price), ((t_out, t_in), keep * keep / price)):
+            if rate > best_rate.get(edge, 0):
+                best_rate[edge] = rate
+    now = time.monotonic()
+    _edge_rate.update((edge, (now, rate)) for edge, rate in best_rate.items())
 
     # >>> Step 3 debug: show which triangle edge(s) are missing for GUSDC–GALA–GWETH
     def _has_edge(a: str, b: str, aps: List[ActivePool]) -> bool:
@@ -88,75 +124,236 @@ def discover_active_pools(api: GalaSwapAPI, pools: Sequence[Tuple[str, str]]) ->
     _missing = [f"{a} ↔ {b}" for (a, b) in _required if not _has_edge(a, b, active_pools)]
 
     if _missing:
-        print("🧩 Missing edge(s) for triangle:", ", ".join(_missing))
+        log.debug("🧩 Missing edge(s) for triangle: %s", ", ".join(_missing))
     else:
-        print("✅ All three triangle edges are active — triangles should be possible now.")
+        log.debug("✅ All three triangle edges are active — triangles should be possible now.")
     # <<< end debug
 
-    return active_pools
+    return tuple(active_pools)
 
 
-def enumerate_triangles(active_pools: List[ActivePool]) -> List[Tuple[str, str, str]]:
+@lru_cache(maxsize=4)
+def enumerate_triangles(
+    active_pools: Tuple[ActivePool, ...], start_token: Optional[str] = None
+) -> Tuple[Tuple[str, str, str], ...]:
     """
     Return directed triangles (a,b,c) meaning we will simulate a->b, b->c, c->a.
-    Only include edges that are actually active in that direction.
+    Pool liquidity is symmetric, so an active pool is usable in both directions and
+    each triangle yields both of its orientations.
+    Each directed cycle is listed once. With `start_token`, only cycles through it
+    are returned, rotated so it comes first; otherwise each starts from its
+    smallest token and simulate_cycle rotates it onto the start token.
+    Cached per (active_pools, start_token): the pools only change when
+    discover_active_pools runs, which clears the cache.
+    """
+    edges = {
+        edge for p in active_pools for edge in ((p.token_a, p.token_b), (p.token_b, p.token_a))
+    }
+    # Undirected neighbour sets to find triangles; direction (which matters!) is
+    # checked against the DIRECTED edge set once a triangle is found
+    nbr_names: Dict[str, set] = {}
+    for a, b in edges:
+        if a == b:
+            continue
+        nbr_names.setdefault(a, set()).add(b)
+        nbr_names.setdefault(b, set()).add(a)
+
+    # Intern tokens as small ints, numbered in degree order (ties by name): id
+    # comparison doubles as rank comparison. Adjacency is kept as int bitmasks, so
+    # neighbourhood intersection is one C-level AND instead of a Python set walk
+    name_of = sorted(nbr_names, key=lambda t: (len(nbr_names[t]), t))
+    id_of = {t: i for i, t in enumerate(name_of)}
+    nbrs: List[int] = [0] * len(name_of)
+    out: List[int] = [0] * len(name_of)
+    for a, b in edges:
+        if a != b:
+            ia, ib = id_of[a], id_of[b]
+            nbrs[ia] |= 1 << ib
+            nbrs[ib] |= 1 << ia
+            out[ia] |= 1 << ib
+
+    triangles: List[Tuple[str, str, str]] = []
+
+    def _emit(u: int, v: int, w: int) -> None:
+        # both orientations of the triangle are distinct directed cycles
+        for a, b, c in ((u, v, w), (u, w, v)):
+            if out[a] >> b & 1 and out[b] >> c & 1 and out[c] >> a & 1:
+                cyc = (name_of[a], name_of[b], name_of[c])
+                if start_token is None:
+                    # one entry per directed cycle; simulate_cycle rotates to start_token
+                    cyc = min(cyc, cyc[1:] + cyc[:1], cyc[2:] + cyc[:2])
+                triangles.append(cyc)
+
+    if start_token is not None:
+        # only triangles through start_token: pairs of its neighbours that are adjacent
+        s = id_of.get(start_token)
+        if s is None:
+            return ()
+        for v in _bits(nbrs[s]):
+            for w in _bits(nbrs[s] & nbrs[v] & ~((2 << v) - 1)):
+                _emit(s, v, w)
+        return tuple(triangles)
+
+    # Degree ordering: orient every edge from lower to higher rank. The result is
+    # acyclic, so each undirected triangle u<v<w is met exactly once, as a common
+    # forward neighbour w of u and v - no dedupe set needed
+    fwd = [mask & ~((2 << u) - 1) for u, mask in enumerate(nbrs)]
+    for u, fu in enumerate(fwd):
+        for v in _bits(fu):
+            for w in _bits(fu & fwd[v]):
+                _emit(u, v, w)
+
+    return tuple(triangles)
+
+
+def estimate_cycle_bps(cycle: Tuple[str, str, str]) -> Optional[int]:
+    """
+    Rough gross bps of a->b->c->a from the latest discovery/scan prices, or None when
+    an edge has no price younger than _EDGE_RATE_MAX_AGE.
     """
-    # Build DIRECTED adjacency from the discovered active pools (direction matters!)
-    adj: Dict[str, set] = {}
-    for p in active_pools:
-        adj.setdefault(p.token_a, set()).add(p.token_b)
+    a, b, c = cycle
+    oldest = time.monotonic() - _EDGE_RATE_MAX_AGE
+    product = Decimal(1)
+    for t_in, t_out in ((a, b), (b, c), (c, a)):
+        hit = _edge_rate.get((t_in, t_out))
+        if hit is None or hit[0] < oldest:
+            return None
+        product *= hit[1]
+    return int((product - 1) * 10_000)
 
-    rotations: List[Tuple[str, str, str]] = []
-    tokens = list(adj.keys())
 
-    for a in tokens:
-        for b in adj.get(a, ()):
-            if b == a:
-                continue
-            for c in adj.get(b, ()):
-                if c in (a, b):
-                    continue
-                # require closing edge c -> a to form a directed 3-cycle
-                if a in adj.get(c, ()):
-                    # return the three rotations so start_token alignment can work
-                    rotations.extend([
-                        (a, b, c),
-                        (b, c, a),
-                        (c, a, b),
-                    ])
-
-    # De-duplicate identical tuples that may appear due to multiple fees
-    unique = list(dict.fromkeys(rotations))
-    return unique
+def prefilter_triangles(
+    cycles: Sequence[Tuple[str, str, str]], min_bps: int
+) -> List[Tuple[str, str, str]]:
+    """ Drop cycles whose estimated gross bps is below min_bps; unpriced or stale cycles are kept. """
+    kept = []
+    for cyc in cycles:
+        est = estimate_cycle_bps(cyc)
+        if est is not None and est < min_bps:
+            log.debug("   ✂️  Pruned %s->%s->%s->%s | est=%d bps", cyc[0], cyc[1], cyc[2], cyc[0], est)
+            continue
+        kept.append(cyc)
+    return kept
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """ Yield the indices of set bits, lowest first. """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
 
 
 # -------- Quote helper with fallback/backoff ----------------------------------
-def _best_quote_safe(api: GalaSwapAPI, t_in: str, t_out: str, amount: Decimal) -> Quote:
+_AMOUNT_QUANTUM = Decimal("0.00000001")
+_MAX_HOP_INPUT = config.MAX_HOP_INPUT or Decimal("0")  # 0 = no cap
+_BISECT_STEPS = 3
+
+# Largest input that filled on each (t_in, t_out) edge during the current scan
+_max_fill_hint: Dict[Tuple[str, str], Decimal] = {}
+
+
+# best_quote outcomes per (t_in, t_out, amount): key -> (expires_at, quote, error message).
+# Failures keep only the message; a shared exception object would have its traceback
+# rewritten by every sim thread that re-raised it
+_best_quote_memo: Dict[Tuple[str, str, Decimal], Tuple[float, Optional[Quote], str]] = {}
+_best_quote_memo_lock = threading.Lock()
+
+
+def reset_scan_state() -> None:
+    """Forget per-scan hop size hints and memoized quotes. Call at the start of every scan."""
+    _max_fill_hint.clear()
+    with _best_quote_memo_lock:
+        _best_quote_memo.clear()
+
+
+def cached_best_quote(api: GalaSwapAPI, t_in: str, t_out: str, amount: Decimal) -> Quote:
     """
-    Try to get a quote. If the full amount fails, clamp to ARB_MAX_HOP_INPUT and back off.
+    api.best_quote memoized for QUOTE_CACHE_TTL_SECONDS. Unlike the api's per-fee
+    cache this also remembers "no liquidity at this size", so other rotations and
+    bisection steps don't re-ask a size that just failed.
     """
+    key = (t_in, t_out, amount)
+    with _best_quote_memo_lock:
+        hit = _best_quote_memo.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        if hit[1] is None:
+            raise RuntimeError(hit[2])
+        return replace(hit[1])
+
     try:
-        from . import config
-        max_in = Decimal(str(getattr(config, "MAX_HOP_INPUT", Decimal("0")) or Decimal("0")))
-    except Exception:
-        max_in = Decimal("0")
+        quote = api.best_quote(t_in, t_out, amount)
+    except (RuntimeError, ValueError) as e:
+        if config.QUOTE_CACHE_TTL_SECONDS > 0:
+            with _best_quote_memo_lock:
+                _best_quote_memo[key] = (time.monotonic() + config.QUOTE_CACHE_TTL_SECONDS, None, str(e))
+        raise
+    if quote.amount_in > 0 and quote.amount_out > 0:
+        # fresh price for the prefilter, so it isn't stuck with discovery's
+        _edge_rate[(t_in, t_out)] = (time.monotonic(), quote.amount_out / quote.amount_in)
+    if config.QUOTE_CACHE_TTL_SECONDS > 0:
+        with _best_quote_memo_lock:
+            _best_quote_memo[key] = (time.monotonic() + config.QUOTE_CACHE_TTL_SECONDS, quote, "")
+    return replace(quote)
 
-    amt0 = amount
-    if max_in > 0 and amt0 > max_in:
-        amt0 = max_in
 
-    last_err = None
-    for factor in [Decimal("1"), Decimal("0.5"), Decimal("0.2"), Decimal("0.1"), Decimal("0.05")]:
-        amt_try = (amt0 * factor).quantize(Decimal("0.00000001"))
+def _best_quote_safe(api: GalaSwapAPI, t_in: str, t_out: str, amount: Decimal) -> Quote:
+    """
+    Try to get a quote. If the full amount has no liquidity, clamp to ARB_MAX_HOP_INPUT and
+    bisect down towards LIQUIDITY_CHECK_AMOUNT for the largest size that still fills.
+    """
+    amt0 = amount
+    if _MAX_HOP_INPUT > 0 and amt0 > _MAX_HOP_INPUT:
+        amt0 = _MAX_HOP_INPUT
+    # an earlier rotation this scan already found how much this edge can take
+    hint = _max_fill_hint.get((t_in, t_out))
+    if hint is not None and amt0 > hint:
+        amt0 = hint
+    amt0 = amt0.quantize(_AMOUNT_QUANTUM)
+
+    # RuntimeError/ValueError mean no fee tier could fill this size; network/5xx errors
+    # are retried by the session adapter and propagate from here
+    try:
+        return cached_best_quote(api, t_in, t_out, amt0)
+    except (RuntimeError, ValueError) as e:
+        last_err = e
+
+    # the liquidity probe size filled during discovery, so bisect between it and amt0
+    lo, hi = config.LIQUIDITY_CHECK_AMOUNT, amt0
+    best = None
+    for _ in range(_BISECT_STEPS):
+        if hi <= lo:
+            break
+        mid = ((lo + hi) / 2).quantize(_AMOUNT_QUANTUM)
+        try:
+            best = cached_best_quote(api, t_in, t_out, mid)
+            lo = mid
+        except (RuntimeError, ValueError) as e:
+            last_err = e
+            hi = mid
+    if best is None and lo < amt0:
         try:
-            return api.best_quote(t_in, t_out, amt_try)
-        except Exception as e:
+            best = cached_best_quote(api, t_in, t_out, lo.quantize(_AMOUNT_QUANTUM))
+        except (RuntimeError, ValueError) as e:
             last_err = e
-    raise last_err  # type: ignore[misc]
+    if best is None:
+        raise last_err
 
+    _max_fill_hint[(t_in, t_out)] = best.amount_in
+    return best
 
 
-def simulate_cycle(api: GalaSwapAPI, cycle: Tuple[str, str, str], start_token: str, amount: Decimal) -> CycleResult | None:
+def simulate_cycle(
+    api: GalaSwapAPI,
+    cycle: Tuple[str, str, str],
+    start_token: str,
+    amount: Decimal,
+    q1: Optional[Quote] = None,
+) -> CycleResult | None:
+    """
+    Quote a->b, b->c, c->a from start_token. Pass `q1` to reuse an already fetched
+    start_token->b quote for the first leg.
+    """
     a, b, c = cycle
 
     # If the start token isn't in this triangle, skip
@@ -174,28 +371,29 @@ def simulate_cycle(api: GalaSwapAPI, cycle: Tuple[str, str, str], start_token: s
     # --- DEBUGGED QUOTE SEQUENCE with fallback ---
     try:
         # Hop 1: a->b
-        q1 = _best_quote_safe(api, a, b, amount)
-        print(f"   ↪️  Hop1 {a}->{b} | in={q1.amount_in} | out={q1.amount_out} | fee={q1.fee_used}")
+        if q1 is None:
+            q1 = _best_quote_safe(api, a, b, amount)
+        log.debug("   ↪️  Hop1 %s->%s | in=%s | out=%s | fee=%s", a, b, q1.amount_in, q1.amount_out, q1.fee_used)
         if q1.amount_out <= 0:
-            print(f"   ⚠️  Hop1 produced non-positive out; dropping cycle.")
+            log.debug("   ⚠️  Hop1 produced non-positive out; dropping cycle.")
             return None
 
         # Hop 2: b->c (use output of hop1)
         q2 = _best_quote_safe(api, b, c, q1.amount_out)
-        print(f"   ↪️  Hop2 {b}->{c} | in={q2.amount_in} | out={q2.amount_out} | fee={q2.fee_used}")
+        log.debug("   ↪️  Hop2 %s->%s | in=%s | out=%s | fee=%s", b, c, q2.amount_in, q2.amount_out, q2.fee_used)
         if q2.amount_out <= 0:
-            print(f"   ⚠️  Hop2 produced non-positive out; dropping cycle.")
+            log.debug("   ⚠️  Hop2 produced non-positive out; dropping cycle.")
             return None
 
         # Hop 3: c->a (close the loop)
         q3 = _best_quote_safe(api, c, a, q2.amount_out)
-        print(f"   ↪️  Hop3 {c}->{a} | in={q3.amount_in} | out={q3.amount_out} | fee={q3.fee_used}")
+        log.debug("   ↪️  Hop3 %s->%s | in=%s | out=%s | fee=%s", c, a, q3.amount_in, q3.amount_out, q3.fee_used)
         if q3.amount_out <= 0:
-            print(f"   ⚠️  Hop3 produced non-positive out; dropping cycle.")
+            log.debug("   ⚠️  Hop3 produced non-positive out; dropping cycle.")
             return None
 
     except Exception as e:
-        print(f"   ❌ Quote error on cycle {a}->{b}->{c}->{a}: {e}")
+        log.debug("   ❌ Quote error on cycle %s->%s->%s->%s: %s", a, b, c, a, e)
         return None
     # --- END DEBUGGED QUOTE SEQUENCE ---
 
@@ -207,16 +405,67 @@ def simulate_cycle(api: GalaSwapAPI, cycle: Tuple[str, str, str], start_token: s
     gain = (final_amt - amount) / amount
     gross_bps = int(gain * Decimal(10_000))
 
-    # DEBUG: print every simulated cycle and its profit in BPS
-    print(f"🔎 Cycle {a}->{b}->{c}->{a} | in={amount} {a} | out={final_amt} {a} | gross={gross_bps} bps")
+    # DEBUG: log every simulated cycle and its profit in BPS
+    log.debug("🔎 Cycle %s->%s->%s->%s | in=%s %s | out=%s %s | gross=%d bps", a, b, c, a, amount, a, final_amt, a, gross_bps)
 
     return CycleResult(path=hops, start_token=a, start_amount=amount, final_amount=final_amt, gross_profit_bps=gross_bps)
 
 
+def _safe_first_leg(api: GalaSwapAPI, start_token: str, b: str, amount: Decimal) -> Optional[Quote]:
+    try:
+        return _best_quote_safe(api, start_token, b, amount)
+    except Exception as e:
+        log.debug("   ❌ Quote error on first leg %s->%s: %s", start_token, b, e)
+        return None
+
+
+def _safe_simulate(
+    api: GalaSwapAPI, cycle: Tuple[str, str, str], start_token: str, amount: Decimal, q1: Quote
+) -> Optional[CycleResult]:
+    # one bad cycle must not take down the rest of the scan's worker pool
+    try:
+        return simulate_cycle(api, cycle, start_token, amount, q1=q1)
+    except Exception as e:
+        log.debug("   ❌ Simulation failed for cycle %s: %s", cycle, e)
+        return None
+
+
+def simulate_cycles(
+    api: GalaSwapAPI, cycles: Sequence[Tuple[str, str, str]], start_token: str, amount: Decimal
+) -> List[CycleResult]:
+    """
+    Simulate every cycle that contains start_token. Cycles sharing a first leg
+    (start_token -> b) reuse one quote for it; first legs, and then the remaining
+    two legs of each cycle, are quoted concurrently on SIM_WORKERS threads.
+    """
+    by_first_leg: Dict[str, List[Tuple[str, str, str]]] = {}
+    for cyc in cycles:
+        if start_token not in cyc:
+            continue
+        i = cyc.index(start_token)
+        rotated = (cyc[i], cyc[(i + 1) % 3], cyc[(i + 2) % 3])
+        by_first_leg.setdefault(rotated[1], []).append(rotated)
+    if not by_first_leg:
+        return []
+
+    # separate pool from the API's quote workers: these tasks block on get_quotes themselves.
+    # map() hands tasks out one at a time, so a slow RPC only holds up its own worker
+    workers = max(1, min(config.SIM_WORKERS, sum(len(g) for g in by_first_leg.values())))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gala-sim") as ex:
+        legs = list(by_first_leg)
+        first = ex.map(lambda b: _safe_first_leg(api, start_token, b, amount), legs)
+        jobs = [(cyc, q1) for b, q1 in zip(legs, first) if q1 is not None for cyc in by_first_leg[b]]
+        results = list(ex.map(lambda job: _safe_simulate(api, job[0], start_token, amount, job[1]), jobs))
+    return [r for r in results if r is not None]
+
+
 def prepare_payloads(api: GalaSwapAPI, res: CycleResult, slippage_bps: int) -> List[Hop]:
-    prepared: List[Hop] = []
-    for hop in res.path:
-        payload = api.build_swap_payload(
+    """
+    Fetch the swap payload for every hop (concurrently; they don't depend on each
+    other) and attach it to the hop in place. Returns res.path.
+    """
+    def _build(hop: Hop) -> dict:
+        return api.build_swap_payload(
             token_in_sym=hop.token_in,
             token_out_sym=hop.token_out,
             amount_in=hop.quote_in,
@@ -224,13 +473,8 @@ def prepare_payloads(api: GalaSwapAPI, res: CycleResult, slippage_bps: int) -> L
             fee=hop.fee,
             slippage_bps=slippage_bps,
         )
-        prepared.append(Hop(
-            token_in=hop.token_in,
-            token_out=hop.token_out,
-            fee=hop.fee,
-            quote_in=hop.quote_in,
-            quote_out=hop.quote_out,
-            payload=payload,
-        ))
-    return prepared
 
+    with ThreadPoolExecutor(max_workers=max(1, len(res.path)), thread_name_prefix="gala-payload") as ex:
+        for hop, payload in zip(res.path, ex.map(_build, res.path)):
+            hop.payload = payload
+    return res.path
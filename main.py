@@ -2,6 +2,8 @@
 # file: main.py
 # ==========================================
 from decimal import Decimal
+import logging
+from operator import attrgetter
 import sys
 import time
 
@@ -18,12 +20,19 @@ load_dotenv(dotenv_path=find_dotenv(), override=True)
 
 
 import gala.config as config
-from gala.gala_api import GalaSwapAPI
-from gala.strategies import enumerate_triangles, simulate_cycle, prepare_payloads, discover_active_pools
+from gala.gala_api import GalaSwapAPI, load_private_key
+from gala.strategies import (
+    enumerate_triangles, simulate_cycles, prepare_payloads, discover_active_pools, prefilter_triangles, reset_scan_state,
+)
 
 BUNDLE_SWAP_TYPE_CANDIDATES = ["swap", "Swap"]
+# minOut multiplier for the dry-run report; SLIPPAGE_BPS is fixed for the process
+ONE_MINUS_SLIP = Decimal(10_000 - config.SLIPPAGE_BPS) / Decimal(10_000)
 
 def main() -> int:
+    # strategies logs per-hop/per-probe detail at DEBUG; the default INFO keeps output to summaries
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL, logging.INFO), format="%(message)s")
+
     # Quick sanity echo so you can see the effective config at startup
     print(
         f"[init] user={config.USER_ADDRESS or '<missing>'} | "
@@ -39,12 +48,18 @@ def main() -> int:
         print("[!] PRIVATE_KEY_HEX missing (env GALA_PRIVATE_KEY). Aborting.")
         return 2
 
+    # parse the signing key once up front rather than on every hop
+    signer = None if config.DRY_RUN else load_private_key(config.PRIVATE_KEY_HEX)
+
     api = GalaSwapAPI()
 
     scan_count = 0
-    active_pools = []
+    active_pools = ()
     while True:
         print(f"\n--- Starting scan #{scan_count+1} ---")
+        # quotes and hop size hints from the previous scan are stale; only reuse within a scan
+        api.clear_quote_cache()
+        reset_scan_state()
 
         # 1) Find all active pools and fees, but only periodically
         if scan_count % config.POOL_REFRESH_INTERVAL == 0:
@@ -56,30 +71,28 @@ def main() -> int:
             time.sleep(config.SCAN_INTERVAL_SECONDS)
             continue
 
-        # 2) Build all triangles from active pools
-        triangles = enumerate_triangles(active_pools)
+        # 2) Build all triangles through START_TOKEN from active pools
+        triangles = enumerate_triangles(active_pools, config.START_TOKEN)
         if not triangles:
             print("No triangles available from active pools; adjust config.")
             scan_count += 1
             time.sleep(config.SCAN_INTERVAL_SECONDS)
             continue
 
-        # 3) Simulate each triangle starting from START_TOKEN
-        best = None
+        # 3) Drop triangles the discovery prices already rule out, then simulate the rest
+        # starting from START_TOKEN. SLIPPAGE_BPS is the margin for how stale/rough those prices are
+        threshold = config.MIN_PROFIT_BPS + config.PROFIT_BUFFER_BPS
+        candidates = prefilter_triangles(triangles, threshold - config.SLIPPAGE_BPS)
+        if not candidates:
+            print(f"No triangles pass the price prefilter ({len(triangles)} pruned).")
+            scan_count += 1
+            time.sleep(config.SCAN_INTERVAL_SECONDS)
+            continue
+        triangles = candidates
+
         print(f"Simulating {len(triangles)} triangles...")
-        for cyc in triangles[: config.MAX_CYCLES_PER_SCAN]:
-            if cyc[0] != config.START_TOKEN:
-                continue
-            try:
-                res = simulate_cycle(api, cyc, config.START_TOKEN, config.START_AMOUNT)
-            except Exception:
-                # noisy on purpose only when debugging
-                # print(f"[warn] Simulation failed for cycle {cyc}: {e}")
-                continue
-            if res is None:
-                continue
-            if best is None or res.gross_profit_bps > best.gross_profit_bps:
-                best = res
+        results = simulate_cycles(api, triangles[: config.MAX_CYCLES_PER_SCAN], config.START_TOKEN, config.START_AMOUNT)
+        best = max(results, key=attrgetter("gross_profit_bps"), default=None)
 
         if best is None:
             print("No viable cycle simulations found in this scan.")
@@ -93,7 +106,6 @@ def main() -> int:
             f"in={best.start_amount} out={best.final_amount} profit={best.gross_profit_bps} bps"
         )
 
-        threshold = config.MIN_PROFIT_BPS + config.PROFIT_BUFFER_BPS
         if best.gross_profit_bps < threshold:
             print(f"[skip] Not profitable enough: need >= {threshold} bps, got {best.gross_profit_bps} bps.")
             scan_count += 1
@@ -107,17 +119,19 @@ def main() -> int:
         if config.DRY_RUN:
             print("[dry-run] Would execute hops:")
             for i, hop in enumerate(prepared, 1):
-                min_out = hop.quote_out * (Decimal(1) - Decimal(config.SLIPPAGE_BPS) / Decimal(10_000))
+                min_out = hop.quote_out * ONE_MINUS_SLIP
                 print(f"  Hop {i}: {hop.token_in}->{hop.token_out} fee={hop.fee} in={hop.quote_in} minOut≈{min_out}")
             scan_count += 1
             time.sleep(config.SCAN_INTERVAL_SECONDS)
             continue
 
         # Otherwise, sequentially submit each swap. NOTE: This is not atomic. Use at your own risk.
+        # (GalaSwap's public API documents no multi-swap bundle type to make it atomic.)
+        # Sign every hop up front so no ECDSA work sits between one hop landing and the next going out
+        sigs = [api.sign_payload(hop.payload, signer) for hop in prepared]
         tx_ids = []
-        for i, hop in enumerate(prepared, 1):
+        for i, (hop, sig) in enumerate(zip(prepared, sigs), 1):
             print(f"[exec] Submitting hop {i}: {hop.token_in}->{hop.token_out} amountIn={hop.quote_in} fee={hop.fee}")
-            sig = api.sign_payload(hop.payload, config.PRIVATE_KEY_HEX)
 
             tx_id = None
             last_err = None
@@ -134,15 +148,22 @@ def main() -> int:
             print(f"  -> tx id: {tx_id}")
             tx_ids.append(tx_id)
 
-            # Optional: poll status (basic)
-            time.sleep(2)
+            # Poll with backoff until the tx leaves its pending state (or TX_STATUS_TIMEOUT_SECONDS).
+            # The next hop spends this one's output, so only go on once it has verifiably landed
             try:
-                status = api.check_tx_status(tx_id)
+                status = api.wait_for_tx_status(tx_id)
                 print(f"  -> status: {status.get('status')} method={status.get('method')}")
             except Exception as e:
                 print(f"  -> status check error: {e}")
-
-        print("All hops submitted for this cycle.")
+                status = {}
+            if not api.tx_succeeded(status):
+                if i < len(prepared):
+                    print(f"[error] hop {i} did not succeed; not submitting the remaining {len(prepared) - i} hop(s).")
+                else:
+                    print(f"[error] hop {i} did not succeed.")
+                break
+        else:
+            print("All hops submitted for this cycle.")
         scan_count += 1
         time.sleep(config.SCAN_INTERVAL_SECONDS)
 